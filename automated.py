@@ -14,25 +14,56 @@ disrupts services, or causes harm to any systems.
 """
 
 import asyncio
-import json
+import collections
+import functools
+import inspect
 import logging
+import math
+import os
+import pickle
 import random
 import re
 import time
-from dataclasses import dataclass
+import types
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union
+from string import Template
+from typing import Deque, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import urlparse
 
 import aiohttp
+import aiosmtplib
+import httpx
+import numpy as np
+import orjson
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import smtplib
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Request, Response
-import twilio.rest
+from playwright.async_api import async_playwright, Browser, BrowserContext, CDPSession, ElementHandle, Page, Playwright, Request, Response
 from twocaptcha import TwoCaptcha
 
+# Playwright records inspect.stack() on every API call for its debug
+# metadata, which dominates CPU time in a loop this chatty. Hand its
+# connection module an inspect whose stack() is empty, unless
+# PW_INSPECT_STACK=1 asks for full stacks while debugging.
+if os.environ.get("PW_INSPECT_STACK", "0") != "1":
+    try:
+        from playwright._impl import _connection as _pw_connection
+        _pw_connection.inspect = types.SimpleNamespace(**{
+            **vars(inspect),
+            "stack": lambda *args, **kwargs: [],
+        })
+    except ImportError:
+        pass
+
+# Use libuv-backed event loop when available
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +79,158 @@ logger = logging.getLogger("booking_automation")
 BASE_URL = "https://www.gov.uk/book-pupil-driving-test"
 LOGIN_URL = "https://driverpracticaltest.dvsa.gov.uk/login"
 BOOKING_URL = "https://driverpracticaltest.dvsa.gov.uk/manage"
+STATE_PATH = "state.json"  # saved cookies/storage of the last logged-in session
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+
+# Network traffic worth inspecting in the request/response handlers
+_URL_RE = re.compile(r"(?:api|ajax|recaptcha|cf-challenge)")
+
+# Shared HTTP client so outgoing API calls reuse pooled connections
+_http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=30,
+)
+
+# Shared generator for bulk random draws
+_RNG = np.random.default_rng()
+
+# Browser-side scripts, built once at import
+_CF_JS = """
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => false
+});
+
+// Hide automation-related properties
+if (window.navigator.plugins) {
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [
+            { name: 'PDF Viewer', filename: 'internal-pdf-viewer' },
+            { name: 'Chrome PDF Viewer', filename: 'internal-pdf-viewer' },
+            { name: 'Chromium PDF Viewer', filename: 'internal-pdf-viewer' },
+            { name: 'Microsoft Edge PDF Viewer', filename: 'internal-pdf-viewer' },
+            { name: 'WebKit built-in PDF', filename: 'internal-pdf-viewer' }
+        ]
+    });
+}
+
+// Add platform details, language comes from the context locale
+Object.defineProperty(navigator, 'platform', {
+    get: () => 'Win32'
+});
+"""
+
+_EVASION_JS = """
+// Override navigator properties to evade fingerprinting
+const originalGetParameter = URLSearchParams.prototype.get;
+URLSearchParams.prototype.get = function(name) {
+    // Detect potential fingerprinting attempts
+    if (name === 'automation' || name === 'webdriver' || name === 'driver' || name === 'selenium') {
+        return null;
+    }
+    return originalGetParameter.call(this, name);
+};
+
+// Add canvas noise to prevent fingerprinting
+const originalGetContext = HTMLCanvasElement.prototype.getContext;
+HTMLCanvasElement.prototype.getContext = function() {
+    const context = originalGetContext.apply(this, arguments);
+    if (context && arguments[0] === '2d') {
+        const originalFillText = context.fillText;
+        context.fillText = function() {
+            originalFillText.apply(this, arguments);
+            // Add slight noise to canvas data
+            const imageData = context.getImageData(0, 0, this.canvas.width, this.canvas.height);
+            const pixels = imageData.data;
+            // Modify a few random pixels slightly
+            for (let i = 0; i < 20; i++) {
+                const idx = Math.floor(Math.random() * pixels.length / 4) * 4;
+                pixels[idx] = Math.max(0, Math.min(255, pixels[idx] + Math.floor(Math.random() * 3) - 1));
+            }
+            context.putImageData(imageData, 0, 0);
+        };
+    }
+    return context;
+};
+"""
+
+_RECAPTCHA_JS = Template("""
+document.querySelector('[name="g-recaptcha-response"]').innerHTML = "$token";
+document.querySelector('[name="g-recaptcha-response"]').value = "$token";
+
+// Also set in the grecaptcha object if it exists
+if (typeof grecaptcha !== 'undefined') {
+    if (grecaptcha.enterprise) {
+        grecaptcha.enterprise.getResponse = function() { return "$token"; };
+    }
+    grecaptcha.getResponse = function() { return "$token"; };
+}
+""")
+
+# Resolves once an element matching the selector is in the DOM, checked on
+# every mutation rather than on a polling interval. Rejects after the
+# timeout, disconnecting the observer so it doesn't outlive the wait.
+_DOM_WAIT_JS = """
+([selector, timeout]) => new Promise((resolve, reject) => {
+    if (document.querySelector(selector)) {
+        return resolve(true);
+    }
+    const observer = new MutationObserver(() => {
+        if (document.querySelector(selector)) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(true);
+        }
+    });
+    const timer = setTimeout(() => {
+        observer.disconnect();
+        reject(new Error(`Timeout ${timeout}ms exceeded waiting for "${selector}"`));
+    }, timeout);
+    observer.observe(document, { childList: true, subtree: true });
+})
+"""
+
+# Reads every open day and its times when the slot picker has rendered all
+# day panels up front. Returns null when any open day's panel is still
+# empty, i.e. its times are only loaded once the day is clicked.
+_DAY_PANELS_JS = """
+() => {
+    const days = Array.from(
+        document.querySelectorAll('.SlotPicker-days .SlotPicker-day:not(.is-disabled)'),
+        (day) => {
+            const panel = day.nextElementSibling;
+            const times = panel && panel.matches('.SlotPicker-day-panel')
+                ? Array.from(panel.querySelectorAll('.SlotPicker-time'), (t) => t.dataset.time)
+                : [];
+            return { date: day.dataset.date, times };
+        }
+    );
+    return days.length && days.every((day) => day.times.length) ? days : null;
+}
+"""
+
+# Index of the first search result whose text contains the given name,
+# case-insensitively, or -1 when there is none.
+_MATCH_LINK_JS = """
+(links, name) => {
+    const needle = name.toLowerCase();
+    return links.findIndex((a) => (a.textContent || '').toLowerCase().includes(needle));
+}
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _bezier_basis(steps: int, degree: int = 2) -> np.ndarray:
+    """
+    Bernstein basis matrix for sampling a Bezier curve at steps + 1 points
+    Row i holds the weights of each control point at t = i / steps
+    """
+    t = np.linspace(0.0, 1.0, steps + 1)[:, np.newaxis]
+    j = np.arange(degree + 1)
+    coefficients = np.array([math.comb(degree, k) for k in j], dtype=float)
+    basis = coefficients * (1 - t) ** (degree - j) * t ** j
+    # Cached and shared between calls, so guard against in-place edits
+    basis.flags.writeable = False
+    return basis
 
 
 class TestType(Enum):
@@ -57,41 +240,53 @@ class TestType(Enum):
     PCV = "pcv"
 
 
-@dataclass
+class CycleResult(Enum):
+    BOOKED = "booked"
+    NO_SLOTS = "no_slots"
+    SLOT_SEEN = "slot_seen"  # a suitable slot was found but booking it failed
+    ERROR = "error"
+
+
+@dataclass(frozen=True, slots=True)
 class TestCenter:
     id: str
     name: str
     distance: Optional[float] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DateRange:
     start_date: datetime
     end_date: datetime
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TimePreference:
     earliest: str  # Format: "HH:MM" in 24-hour format
     latest: str    # Format: "HH:MM" in 24-hour format
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Credentials:
     license_number: str
     application_reference: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ProxyConfig:
     host: str
     port: int
     username: str
     password: str
     rotation_interval: int  # in seconds
+    url: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Build the Playwright proxy URL once instead of on every lookup
+        object.__setattr__(self, "url", f"http://{self.username}:{self.password}@{self.host}:{self.port}")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NotificationConfig:
     # Email settings
     email_enabled: bool = False
@@ -110,19 +305,20 @@ class NotificationConfig:
     twilio_to_number: str = ""
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     credentials: Credentials
     test_type: TestType
-    test_centers: List[TestCenter]
+    test_centers: Tuple[TestCenter, ...]
     date_range: DateRange
     time_preference: TimePreference
-    preferred_days: Set[int]  # 0=Monday, 6=Sunday
-    proxies: List[ProxyConfig]
+    preferred_days: FrozenSet[int]  # 0=Monday, 6=Sunday
+    proxies: Tuple[ProxyConfig, ...]
     twocaptcha_api_key: str
     notification: NotificationConfig
-    check_interval: Tuple[int, int]  # min, max seconds between checks
+    check_interval: Tuple[int, int]  # backoff range, min and max seconds between checks
     headless: bool = False
+    stop_at_first_slot: bool = True  # stop scanning a center once a suitable slot is found
 
 
 class FingerPrintGenerator:
@@ -151,20 +347,25 @@ class FingerPrintGenerator:
         {"width": 2560, "height": 1440}
     ]
     
+    @staticmethod
+    def _choice(options: List):
+        """Pick one option, keeping its original Python type"""
+        return options[_RNG.integers(len(options))]
+    
     @classmethod
     def generate(cls) -> Dict:
         """Generate a random fingerprint configuration"""
-        chrome_version = random.choice(cls.CHROME_VERSIONS)
-        user_agent_template = random.choice(cls.USER_AGENTS)
+        chrome_version = cls._choice(cls.CHROME_VERSIONS)
+        user_agent_template = cls._choice(cls.USER_AGENTS)
         user_agent = user_agent_template.format(version=chrome_version)
-        viewport = random.choice(cls.VIEWPORT_SIZES)
+        viewport = cls._choice(cls.VIEWPORT_SIZES)
         
         return {
             "userAgent": user_agent,
             "viewport": viewport,
-            "deviceScaleFactor": random.choice([1, 1.25, 1.5, 2]),
-            "hasTouch": random.choice([True, False]),
-            "locale": random.choice(["en-GB", "en-US"]),
+            "deviceScaleFactor": cls._choice([1, 1.25, 1.5, 2]),
+            "hasTouch": cls._choice([True, False]),
+            "locale": cls._choice(["en-GB", "en-US"]),
             "timezoneId": "Europe/London",
         }
 
@@ -172,11 +373,19 @@ class FingerPrintGenerator:
 class MousePatternGenerator:
     """Generate human-like mouse movements"""
     
+    # Number of mouse events sent over CDP before pausing
+    MOVE_BATCH_SIZE = 8
+    
     @staticmethod
-    async def move_like_human(page: Page, target_x: int, target_y: int):
-        """Simulate human-like mouse movement to a target position"""
-        # Get current viewport size
-        viewport = await page.viewport_size()
+    async def move_like_human(page: Page, target_x: int, target_y: int, cdp: Optional[CDPSession] = None,
+                              viewport: Optional[Dict] = None):
+        """
+        Simulate human-like mouse movement to a target position
+        Events are pipelined through the CDP session when one is given
+        """
+        # Get current viewport size, preferring the caller's cached copy
+        if viewport is None:
+            viewport = page.viewport_size
         if not viewport:
             viewport = {"width": 1366, "height": 768}
         
@@ -194,37 +403,51 @@ class MousePatternGenerator:
         control_x = current_x + (target_x - current_x) / 2 + random.randint(-100, 100)
         control_y = current_y + (target_y - current_y) / 2 + random.randint(-100, 100)
         
-        await page.mouse.move(current_x, current_y)
-        
-        for i in range(1, steps + 1):
-            # Bezier curve calculation for a single control point
-            t = i / steps
-            one_minus_t = 1 - t
-            
-            x = one_minus_t**2 * current_x + 2 * one_minus_t * t * control_x + t**2 * target_x
-            y = one_minus_t**2 * current_y + 2 * one_minus_t * t * control_y + t**2 * target_y
-            
-            # Add small random fluctuations to simulate hand tremor
-            x += random.randint(-3, 3)
-            y += random.randint(-3, 3)
-            
-            # Ensure we stay within viewport
-            x = max(0, min(viewport["width"], x))
-            y = max(0, min(viewport["height"], y))
-            
-            # Random delay between movements
-            delay = random.uniform(5, 15)
-            await page.mouse.move(x, y, steps={"delay": delay})
+        # Bezier curve calculation for a single control point
+        control_points = np.array([
+            [current_x, current_y],
+            [control_x, control_y],
+            [target_x, target_y],
+        ], dtype=float)
+        points = _bezier_basis(steps)[1:] @ control_points
+        
+        # Add small random fluctuations to simulate hand tremor
+        points += _RNG.integers(-3, 4, size=points.shape)
+        
+        # Ensure we stay within viewport
+        np.clip(points, 0, [viewport["width"], viewport["height"]], out=points)
+        
+        path = [(current_x, current_y)] + points.tolist()
+        batch_size = MousePatternGenerator.MOVE_BATCH_SIZE
+        
+        # Random delay after each movement, plus the occasional pause
+        delays = _RNG.uniform(5, 15, size=len(path)) / 1000
+        pauses = _RNG.random(size=len(path)) < 0.2
+        delays[pauses] += _RNG.uniform(0.1, 0.3, size=int(pauses.sum()))
+        
+        for start in range(0, len(path), batch_size):
+            batch = path[start:start + batch_size]
+            if cdp:
+                await asyncio.gather(*(
+                    cdp.send("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": float(x), "y": float(y)})
+                    for x, y in batch
+                ))
+            else:
+                for x, y in batch:
+                    await page.mouse.move(x, y)
             
-            # Random pause during movement
-            if random.random() < 0.2:
-                await asyncio.sleep(random.uniform(0.1, 0.3))
+            await asyncio.sleep(float(delays[start:start + batch_size].sum()))
     
     @staticmethod
-    async def realistic_click(page: Page, selector: str):
-        """Perform a realistic mouse movement and click on an element"""
+    async def realistic_click(page: Page, selector: Union[str, ElementHandle], cdp: Optional[CDPSession] = None,
+                              viewport: Optional[Dict] = None):
+        """Perform a realistic mouse movement and click on an element, given by selector or handle"""
         # Wait for element to be visible
-        element = await page.wait_for_selector(selector, state="visible")
+        if isinstance(selector, ElementHandle):
+            element = selector
+            await element.wait_for_element_state("visible")
+        else:
+            element = await page.wait_for_selector(selector, state="visible")
         if not element:
             logger.error(f"Element with selector '{selector}' not found")
             return False
@@ -240,13 +463,19 @@ class MousePatternGenerator:
         target_y = box["y"] + random.uniform(5, box["height"] - 5)
         
         # Move mouse like a human
-        await MousePatternGenerator.move_like_human(page, target_x, target_y)
+        await MousePatternGenerator.move_like_human(page, target_x, target_y, cdp=cdp, viewport=viewport)
         
         # Random delay before clicking (hesitation)
         await asyncio.sleep(random.uniform(0.1, 0.5))
         
         # Click with random duration
-        await page.mouse.click(target_x, target_y, delay=random.randint(50, 150))
+        if cdp:
+            event = {"x": float(target_x), "y": float(target_y), "button": "left", "clickCount": 1}
+            await cdp.send("Input.dispatchMouseEvent", {"type": "mousePressed", **event})
+            await asyncio.sleep(random.randint(50, 150) / 1000)
+            await cdp.send("Input.dispatchMouseEvent", {"type": "mouseReleased", **event})
+        else:
+            await page.mouse.click(target_x, target_y, delay=random.randint(50, 150))
         
         # Random delay after clicking
         await asyncio.sleep(random.uniform(0.2, 0.7))
@@ -257,41 +486,50 @@ class MousePatternGenerator:
 class HoneypotDetector:
     """Detect and handle honeypot fields that may be used to detect bots"""
     
+    # Common honeypot patterns
+    HONEYPOT_SELECTORS = [
+        # Hidden fields with names suggesting user interaction
+        'input[type="text"][style*="display: none"]',
+        'input[type="text"][style*="visibility: hidden"]',
+        'input[style*="opacity: 0"]',
+        # Fields with suspicious names
+        'input[name*="hp"]',
+        'input[name*="honey"]',
+        'input[name*="pot"]',
+        'input[name*="bot"]',
+        # Fields positioned off-screen
+        'input[style*="position: absolute"][style*="left: -"]',
+        'input[style*="position: absolute"][style*="top: -"]',
+    ]
+    
+    # Single selector list so the page runs one querySelectorAll
+    HONEYPOT_SELECTOR = ", ".join(HONEYPOT_SELECTORS)
+    
     @staticmethod
     async def identify_and_avoid_honeypots(page: Page):
         """Identify potential honeypot fields and ensure we don't interact with them"""
-        # Common honeypot patterns
-        honeypot_selectors = [
-            # Hidden fields with names suggesting user interaction
-            'input[type="text"][style*="display: none"]',
-            'input[type="text"][style*="visibility: hidden"]',
-            'input[style*="opacity: 0"]',
-            # Fields with suspicious names
-            'input[name*="hp"]',
-            'input[name*="honey"]',
-            'input[name*="pot"]',
-            'input[name*="bot"]',
-            # Fields positioned off-screen
-            'input[style*="position: absolute"][style*="left: -"]',
-            'input[style*="position: absolute"][style*="top: -"]',
-        ]
-
-        # Check for potential honeypots
-        for selector in honeypot_selectors:
-            honeypot_elements = await page.query_selector_all(selector)
-            for element in honeypot_elements:
-                # Log the detected honeypot
-                name_attr = await element.get_attribute("name")
-                id_attr = await element.get_attribute("id")
-                logger.info(f"Potential honeypot detected: {name_attr or id_attr or 'unnamed'}")
-                
-                # For some honeypots, we may need to set a value
-                # This is tricky as we need to decide whether it should be left empty or filled
-                visible = await element.is_visible()
-                if not visible:
-                    # If it's hidden, it's likely a honeypot that should be left empty
-                    logger.info(f"Leaving honeypot field empty: {name_attr or id_attr or 'unnamed'}")
-                    continue
+        # Collect every candidate and its visibility in one round trip
+        honeypots = await page.evaluate("""
+            (selector) => Array.from(document.querySelectorAll(selector), (el) => {
+                const style = window.getComputedStyle(el);
+                return {
+                    name: el.getAttribute('name'),
+                    id: el.id || null,
+                    visible: style.visibility !== 'hidden' &&
+                             style.display !== 'none' &&
+                             el.getClientRects().length > 0
+                };
+            })
+        """, HoneypotDetector.HONEYPOT_SELECTOR)
+        
+        for honeypot in honeypots:
+            # Log the detected honeypot
+            label = honeypot["name"] or honeypot["id"] or "unnamed"
+            logger.info(f"Potential honeypot detected: {label}")
+            
+            if not honeypot["visible"]:
+                # If it's hidden, it's likely a honeypot that should be left empty
+                logger.info(f"Leaving honeypot field empty: {label}")
 
 
 class CaptchaSolver:
@@ -310,7 +548,7 @@ class CaptchaSolver:
         try:
             # We need to run the 2Captcha API call in a separate thread
             # since it's a blocking operation
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             result = await loop.run_in_executor(
                 None,
                 lambda: self.solver.recaptcha(
@@ -331,56 +569,22 @@ class CaptchaSolver:
         """Inject reCAPTCHA solution token into the page"""
         logger.info("Injecting reCAPTCHA solution...")
         
-        # JavaScript to set the reCAPTCHA response
-        js_code = f"""
-        document.querySelector('[name="g-recaptcha-response"]').innerHTML = "{token}";
-        document.querySelector('[name="g-recaptcha-response"]').value = "{token}";
-        
-        // Also set in the grecaptcha object if it exists
-        if (typeof grecaptcha !== 'undefined') {{
-            grecaptcha.enterprise?.getResponse = function() {{ return "{token}"; }};
-            grecaptcha.getResponse = function() {{ return "{token}"; }};
-        }}
-        """
-        
-        await page.evaluate(js_code)
+        await page.evaluate(_RECAPTCHA_JS.safe_substitute(token=token))
         logger.info("reCAPTCHA solution injected")
 
 
 class CloudflareBypass:
     """Techniques to bypass Cloudflare protection"""
     
+    CHALLENGE_SELECTOR = "div#cf-challenge-running, iframe[src*='challenges.cloudflare.com']"
+    
     @staticmethod
-    async def setup_browser_for_cf_bypass(context: BrowserContext):
-        """Configure browser to better handle Cloudflare challenges"""
-        # Set specific headers that help avoid triggering Cloudflare
-        await context.add_init_script("""
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => false
-        });
-        
-        // Hide automation-related properties
-        if (window.navigator.plugins) {
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [
-                    { name: 'PDF Viewer', filename: 'internal-pdf-viewer' },
-                    { name: 'Chrome PDF Viewer', filename: 'internal-pdf-viewer' },
-                    { name: 'Chromium PDF Viewer', filename: 'internal-pdf-viewer' },
-                    { name: 'Microsoft Edge PDF Viewer', filename: 'internal-pdf-viewer' },
-                    { name: 'WebKit built-in PDF', filename: 'internal-pdf-viewer' }
-                ]
-            });
-        }
-        
-        // Add language and platform details
-        Object.defineProperty(navigator, 'language', {
-            get: () => 'en-GB'
-        });
-        
-        Object.defineProperty(navigator, 'platform', {
-            get: () => 'Win32'
-        });
-        """)
+    async def setup_browser_for_cf_bypass(context: BrowserContext, extra_script: str = ""):
+        """
+        Configure browser to better handle Cloudflare challenges
+        Any extra script is merged in so each frame compiles a single init script
+        """
+        await context.add_init_script(_CF_JS + extra_script)
     
     @staticmethod
     async def handle_cf_challenge(page: Page, timeout: int = 30):
@@ -389,11 +593,31 @@ class CloudflareBypass:
         Returns True if challenge was handled, False if no challenge detected
         """
         try:
-            # Check if we hit a Cloudflare challenge
-            cf_detected = await page.wait_for_selector(
-                "div#cf-challenge-running, iframe[src*='challenges.cloudflare.com']",
+            # Race the challenge against the page's main content so a clean
+            # page doesn't have to sit out the full detection timeout
+            challenge = asyncio.create_task(page.wait_for_selector(
+                CloudflareBypass.CHALLENGE_SELECTOR,
                 timeout=5000
-            )
+            ))
+            content = asyncio.create_task(page.wait_for_selector(
+                "main, #main-content",
+                timeout=5000
+            ))
+            try:
+                done, _ = await asyncio.wait({challenge, content}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                challenge.cancel()
+                content.cancel()
+            challenge_result, _ = await asyncio.gather(challenge, content, return_exceptions=True)
+            
+            if challenge in done:
+                if isinstance(challenge_result, Exception):
+                    raise challenge_result
+                cf_detected = challenge_result
+            else:
+                # Main content appeared first, but a challenge iframe can be
+                # placed inside it, so check once more without waiting
+                cf_detected = await page.query_selector(CloudflareBypass.CHALLENGE_SELECTOR)
             
             if cf_detected:
                 logger.info("Cloudflare challenge detected. Waiting for it to resolve...")
@@ -436,39 +660,36 @@ class CloudflareBypass:
 class ProxyRotator:
     """Manage and rotate through a pool of proxies"""
     
-    def __init__(self, proxies: List[ProxyConfig]):
-        self.proxies = proxies
-        self.current_index = 0
-        self.last_rotation_time = time.time()
+    def __init__(self, proxies: Sequence[ProxyConfig]):
+        # The current proxy is always at the head of the deque
+        self._dq: Deque[ProxyConfig] = collections.deque(proxies)
+        self._deadline = time.monotonic() + self._dq[0].rotation_interval
     
     def get_current_proxy(self) -> ProxyConfig:
         """Get the current proxy configuration"""
-        return self.proxies[self.current_index]
+        return self._dq[0]
     
     def rotate_if_needed(self) -> bool:
         """
         Rotate to the next proxy if the rotation interval has passed
         Returns True if rotation occurred
         """
-        current_proxy = self.get_current_proxy()
-        elapsed_time = time.time() - self.last_rotation_time
-        
-        if elapsed_time >= current_proxy.rotation_interval:
+        if time.monotonic() >= self._deadline:
             self.rotate()
             return True
         return False
     
     def rotate(self) -> ProxyConfig:
         """Rotate to the next proxy and return it"""
-        self.current_index = (self.current_index + 1) % len(self.proxies)
-        self.last_rotation_time = time.time()
-        logger.info(f"Rotated to proxy: {self.get_current_proxy().host}:{self.get_current_proxy().port}")
-        return self.get_current_proxy()
+        self._dq.rotate(-1)
+        proxy = self._dq[0]
+        self._deadline = time.monotonic() + proxy.rotation_interval
+        logger.info(f"Rotated to proxy: {proxy.host}:{proxy.port}")
+        return proxy
     
     def get_proxy_url(self) -> str:
         """Get the current proxy URL in the format required by Playwright"""
-        proxy = self.get_current_proxy()
-        return f"http://{proxy.username}:{proxy.password}@{proxy.host}:{proxy.port}"
+        return self._dq[0].url
 
 
 class Notifier:
@@ -476,6 +697,28 @@ class Notifier:
     
     def __init__(self, config: NotificationConfig):
         self.config = config
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+    
+    async def _get_smtp(self) -> aiosmtplib.SMTP:
+        """Get the long-lived SMTP connection, connecting and logging in if needed"""
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(
+                hostname=self.config.smtp_server,
+                port=self.config.smtp_port,
+                start_tls=True
+            )
+            await self._smtp.connect()
+            await self._smtp.login(self.config.smtp_username, self.config.smtp_password)
+        return self._smtp
+    
+    async def close(self):
+        """Close the cached SMTP connection if one is open"""
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
     
     async def send_email_notification(self, subject: str, message: str) -> bool:
         """Send an email notification"""
@@ -491,10 +734,14 @@ class Notifier:
             
             msg.attach(MIMEText(message, 'plain'))
             
-            with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port) as server:
-                server.starttls()
-                server.login(self.config.smtp_username, self.config.smtp_password)
-                server.send_message(msg)
+            try:
+                smtp = await self._get_smtp()
+                await smtp.send_message(msg)
+            except aiosmtplib.SMTPException:
+                # The cached connection may have gone stale, reconnect once
+                await self.close()
+                smtp = await self._get_smtp()
+                await smtp.send_message(msg)
             
             logger.info(f"Email notification sent to {self.config.recipient_email}")
             return True
@@ -510,17 +757,19 @@ class Notifier:
             return False
         
         try:
-            # Initialize Twilio client
-            client = twilio.rest.Client(self.config.twilio_account_sid, self.config.twilio_auth_token)
-            
-            # Send message
-            message = client.messages.create(
-                body=message,
-                from_=self.config.twilio_from_number,
-                to=self.config.twilio_to_number
+            # Send message through the Twilio REST API
+            response = await _http_client.post(
+                TWILIO_MESSAGES_URL.format(sid=self.config.twilio_account_sid),
+                data={
+                    "Body": message,
+                    "From": self.config.twilio_from_number,
+                    "To": self.config.twilio_to_number
+                },
+                auth=(self.config.twilio_account_sid, self.config.twilio_auth_token)
             )
+            response.raise_for_status()
             
-            logger.info(f"SMS notification sent to {self.config.twilio_to_number}, SID: {message.sid}")
+            logger.info(f"SMS notification sent to {self.config.twilio_to_number}, SID: {response.json()['sid']}")
             return True
             
         except Exception as e:
@@ -531,23 +780,103 @@ class Notifier:
         """Send successful booking notifications through configured channels"""
         message = f"Success! Driving test booked at {test_center} on {test_date} at {test_time}."
         
+        notifications = []
         if self.config.email_enabled:
-            await self.send_email_notification(
+            notifications.append(self.send_email_notification(
                 subject="Driving Test Booking Successful!",
                 message=message
-            )
+            ))
         
         if self.config.sms_enabled:
-            await self.send_sms_notification(message)
+            notifications.append(self.send_sms_notification(message))
+        
+        await asyncio.gather(*notifications, return_exceptions=True)
 
 
 class DrivingTestBooker:
     """Main class to handle driving test booking automation"""
     
+    # Characters used for simulated typos
+    TYPO_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+    
     def __init__(self, config_path: str):
-        with open(config_path, 'r') as f:
-            config_data = json.load(f)
+        self.config = self._load_config(config_path)
+        
+        # Initialize components
+        self.proxy_rotator = ProxyRotator(self.config.proxies)
+        self.captcha_solver = CaptchaSolver(self.config.twocaptcha_api_key)
+        self.notifier = Notifier(self.config.notification)
+        
+        # Slot filters, parsed once rather than per date/time checked
+        self._start_date = self.config.date_range.start_date.date()
+        self._end_date = self.config.date_range.end_date.date()
+        self._earliest_min = self._to_minutes(self.config.time_preference.earliest)
+        self._latest_min = self._to_minutes(self.config.time_preference.latest)
+        
+        # State tracking
+        self._pw: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.cdp: Optional[CDPSession] = None
+        self._viewport: Optional[Dict] = None
+        self.logged_in = False
+        self._state_loaded = False
+        
+        # Last debug screenshot time per tag, to rate-limit them during error storms
+        self._last_shot: Dict[str, float] = {}
+        
+        # Element handles for the current document, cleared on navigation
+        self._sel_cache: Dict[str, ElementHandle] = {}
+        
+        # Consecutive cycles without any slot activity, drives the poll backoff
+        self._idle_streak = 0
+        
+        # Keep references to background tasks so they aren't garbage collected
+        self._bg: Set[asyncio.Task] = set()
+    
+    @classmethod
+    def _load_config(cls, config_path: str) -> Config:
+        """
+        Load the configuration, reusing a pickled copy next to the JSON file
+        when it is newer than both the JSON and this script
+        
+        The cache holds every credential in the config and is unpickled on
+        load, so its directory must be as trusted as the code itself
+        """
+        json_path = Path(config_path)
+        cache_path = json_path.with_suffix(".bin")
+        
+        try:
+            # The script's mtime guards against caches of an older Config layout
+            source_mtime = max(json_path.stat().st_mtime, Path(__file__).stat().st_mtime)
+            if cache_path.stat().st_mtime > source_mtime:
+                config = pickle.loads(cache_path.read_bytes())
+                if isinstance(config, Config):
+                    return config
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config cache {cache_path}: {str(e)}")
+        
+        config = cls._parse_config(orjson.loads(json_path.read_bytes()))
+        
+        try:
+            cache_path.write_bytes(pickle.dumps(config))
+        except OSError as e:
+            logger.warning(f"Could not write config cache {cache_path}: {str(e)}")
         
+        return config
+    
+    @staticmethod
+    def _to_minutes(time_str: str) -> int:
+        """Convert an "HH:MM" string to minutes past midnight"""
+        hour, minute = map(int, time_str.split(":"))
+        return hour * 60 + minute
+    
+    @staticmethod
+    def _parse_config(config_data: Dict) -> Config:
+        """Build the configuration dataclasses from parsed JSON"""
         # Parse credentials
         credentials = Credentials(
             license_number=config_data["credentials"]["license_number"],
@@ -558,14 +887,14 @@ class DrivingTestBooker:
         test_type = TestType(config_data["test_type"])
         
         # Parse test centers
-        test_centers = [
+        test_centers = tuple(
             TestCenter(
                 id=center["id"],
                 name=center["name"],
                 distance=center.get("distance")
             )
             for center in config_data["test_centers"]
-        ]
+        )
         
         # Parse date range
         date_range = DateRange(
@@ -580,10 +909,10 @@ class DrivingTestBooker:
         )
         
         # Parse preferred days
-        preferred_days = set(config_data["preferred_days"])
+        preferred_days = frozenset(config_data["preferred_days"])
         
         # Parse proxies
-        proxies = [
+        proxies = tuple(
             ProxyConfig(
                 host=proxy["host"],
                 port=proxy["port"],
@@ -592,7 +921,7 @@ class DrivingTestBooker:
                 rotation_interval=proxy["rotation_interval"]
             )
             for proxy in config_data["proxies"]
-        ]
+        )
         
         # Parse notification config
         notification = NotificationConfig(
@@ -611,7 +940,7 @@ class DrivingTestBooker:
         )
         
         # Create the final config
-        self.config = Config(
+        return Config(
             credentials=credentials,
             test_type=test_type,
             test_centers=test_centers,
@@ -625,25 +954,34 @@ class DrivingTestBooker:
                 config_data["check_interval"]["min"],
                 config_data["check_interval"]["max"]
             ),
-            headless=config_data.get("headless", False)
+            headless=config_data.get("headless", False),
+            stop_at_first_slot=config_data.get("stop_at_first_slot", True)
         )
+    
+    async def _ensure_browser(self) -> Browser:
+        """Start Playwright and launch the shared browser if not already running"""
+        if self.browser and self.browser.is_connected():
+            return self.browser
         
-        # Initialize components
-        self.proxy_rotator = ProxyRotator(self.config.proxies)
-        self.captcha_solver = CaptchaSolver(self.config.twocaptcha_api_key)
-        self.notifier = Notifier(self.config.notification)
+        if self._pw is None:
+            self._pw = await async_playwright().start()
         
-        # State tracking
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
-        self.logged_in = False
+        # Launch browser with custom settings, proxies are set per context
+        self.browser = await self._pw.chromium.launch(
+            headless=self.config.headless,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                "--disable-features=IsolateOrigins,site-per-process",
+                "--disable-site-isolation-trials",
+            ]
+        )
+        return self.browser
     
     async def setup_browser(self):
         """Initialize and configure the browser for automation"""
         logger.info("Setting up browser...")
         
-        playwright = await async_playwright().start()
+        await self._ensure_browser()
         
         # Generate fingerprint for browser
         fingerprint = FingerPrintGenerator.generate()
@@ -651,21 +989,13 @@ class DrivingTestBooker:
         # Configure proxy
         proxy_url = self.proxy_rotator.get_proxy_url()
         
-        # Launch browser with custom settings
-        self.browser = await playwright.chromium.launch(
-            headless=self.config.headless,
+        # Viewport is fixed for the life of the context
+        self._viewport = fingerprint["viewport"]
+        
+        context_options = dict(
             proxy={
                 "server": proxy_url,
             },
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--disable-features=IsolateOrigins,site-per-process",
-                "--disable-site-isolation-trials",
-            ]
-        )
-        
-        # Create a context with custom settings
-        self.context = await self.browser.new_context(
             user_agent=fingerprint["userAgent"],
             viewport=fingerprint["viewport"],
             device_scale_factor=fingerprint["deviceScaleFactor"],
@@ -676,88 +1006,76 @@ class DrivingTestBooker:
             geolocation={"latitude": 51.5074, "longitude": 0.1278},  # London coordinates
         )
         
+        # Reuse the last logged-in session if one was saved
+        self._state_loaded = Path(STATE_PATH).exists()
+        
+        # Create a context with custom settings
+        self.context = None
+        if self._state_loaded:
+            try:
+                self.context = await self.browser.new_context(storage_state=STATE_PATH, **context_options)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable session state {STATE_PATH}: {str(e)}")
+                Path(STATE_PATH).unlink(missing_ok=True)
+                self._state_loaded = False
+        if self.context is None:
+            self.context = await self.browser.new_context(**context_options)
+        
         # Set up event listeners for requests/responses for debugging
         self.context.on("request", self.handle_request)
         self.context.on("response", self.handle_response)
         
-        # Set up Cloudflare bypass
-        await CloudflareBypass.setup_browser_for_cf_bypass(self.context)
+        # Keep the Accept-Language header in line with the context locale
+        await self.context.set_extra_http_headers({"Accept-Language": f"{fingerprint['locale']},en;q=0.9"})
+        
+        # Set up Cloudflare bypass along with the other evasion scripts
+        await CloudflareBypass.setup_browser_for_cf_bypass(self.context, extra_script=_EVASION_JS)
         
         # Create a new page
         self.page = await self.context.new_page()
+        self._sel_cache.clear()
+        self.page.on("framenavigated", lambda _: self._sel_cache.clear())
         
-        # Add additional scripts to evade detection
-        await self.page.add_init_script("""
-        // Override navigator properties to evade fingerprinting
-        const originalGetParameter = URLSearchParams.prototype.get;
-        URLSearchParams.prototype.get = function(name) {
-            // Detect potential fingerprinting attempts
-            if (name === 'automation' || name === 'webdriver' || name === 'driver' || name === 'selenium') {
-                return null;
-            }
-            return originalGetParameter.call(this, name);
-        };
-        
-        // Add canvas noise to prevent fingerprinting
-        const originalGetContext = HTMLCanvasElement.prototype.getContext;
-        HTMLCanvasElement.prototype.getContext = function() {
-            const context = originalGetContext.apply(this, arguments);
-            if (context && arguments[0] === '2d') {
-                const originalFillText = context.fillText;
-                context.fillText = function() {
-                    originalFillText.apply(this, arguments);
-                    // Add slight noise to canvas data
-                    const imageData = context.getImageData(0, 0, this.canvas.width, this.canvas.height);
-                    const pixels = imageData.data;
-                    // Modify a few random pixels slightly
-                    for (let i = 0; i < 20; i++) {
-                        const idx = Math.floor(Math.random() * pixels.length / 4) * 4;
-                        pixels[idx] = Math.max(0, Math.min(255, pixels[idx] + Math.floor(Math.random() * 3) - 1));
-                    }
-                    context.putImageData(imageData, 0, 0);
-                };
-            }
-            return context;
-        };
-        """)
+        # Dedicated CDP session for dispatching mouse input
+        self.cdp = await self.context.new_cdp_session(self.page)
         
         logger.info("Browser setup complete")
         return self.page
     
     async def handle_request(self, request: Request):
         """Handle and monitor outgoing requests"""
-        if "api" in request.url or "ajax" in request.url:
-            logger.debug(f"REQUEST: {request.method} {request.url}")
+        if _URL_RE.search(request.url) is None:
+            return
+        logger.debug(f"REQUEST: {request.method} {request.url}")
     
     async def handle_response(self, response: Response):
         """Handle and monitor incoming responses"""
-        if "api" in response.url or "ajax" in response.url:
-            logger.debug(f"RESPONSE: {response.status} {response.url}")
+        if _URL_RE.search(response.url) is None:
+            return
+        logger.debug(f"RESPONSE: {response.status} {response.url}")
+        
+        if response.status == 403 or response.status == 429:
+            logger.warning(f"Potential blocking detected: {response.status} response from {response.url}")
             
-            if response.status == 403 or response.status == 429:
-                logger.warning(f"Potential blocking detected: {response.status} response from {response.url}")
-                
-                # Check if we should rotate the proxy
-                if self.proxy_rotator.rotate_if_needed():
-                    logger.info("Rotating proxy due to potential blocking")
-                    await self.restart_session()
+            # Check if we should rotate the proxy
+            if self.proxy_rotator.rotate_if_needed():
+                logger.info("Rotating proxy due to potential blocking")
+                await self.restart_session()
     
     async def restart_session(self):
         """Restart the browser session with a new proxy"""
         logger.info("Restarting browser session...")
         
-        # Close current session
+        # Close current session, the browser itself is kept running
         if self.page:
             await self.page.close()
         if self.context:
             await self.context.close()
-        if self.browser:
-            await self.browser.close()
         
         # Reset state
         self.logged_in = False
         
-        # Set up browser again
+        # Set up a fresh context on the existing browser
         await self.setup_browser()
         
         logger.info("Browser session restarted with new proxy")
@@ -773,32 +1091,80 @@ class DrivingTestBooker:
         logger.debug(f"Random delay: {delay:.2f} seconds")
         await asyncio.sleep(delay)
     
+    async def _debug_shot(self, tag: str, min_interval: float = 60):
+        """Take a debugging screenshot, at most one per tag every min_interval seconds"""
+        now = time.monotonic()
+        if now - self._last_shot.get(tag, -min_interval) < min_interval:
+            return
+        self._last_shot[tag] = now
+        
+        try:
+            await self.page.screenshot(path=f"{tag}_{int(time.time())}.jpg", type="jpeg", quality=60)
+        except Exception as e:
+            logger.warning(f"Could not take {tag} screenshot: {str(e)}")
+    
+    async def _cached_qs(self, selector: str) -> Optional[ElementHandle]:
+        """Query a selector, reusing the handle found earlier on the same document"""
+        handle = self._sel_cache.get(selector)
+        if handle is None:
+            handle = await self.page.query_selector(selector)
+            if handle:
+                self._sel_cache[selector] = handle
+        return handle
+    
+    async def wait_for_next(self, selector: str, jitter: Tuple[float, float] = (0.1, 0.4), timeout: int = 10000):
+        """Wait for the next expected element, then pause briefly to keep human-like timing"""
+        element = await self.page.wait_for_selector(selector, timeout=timeout)
+        await asyncio.sleep(random.uniform(*jitter))
+        return element
+    
+    async def wait_dom(self, selector: str, timeout: int = 5000):
+        """Wait for an element to be attached, reacting to DOM mutations instead of polling"""
+        await self.page.wait_for_function(_DOM_WAIT_JS, arg=[selector, timeout], timeout=timeout)
+    
     async def login(self) -> bool:
         """Login to the driving test booking system"""
         if self.logged_in:
             logger.info("Already logged in")
             return True
             
+        if self._state_loaded:
+            # Only try the saved session once per context
+            self._state_loaded = False
+            if await self._resume_session():
+                logger.info("Resumed saved session, skipping login")
+                self.logged_in = True
+                return True
+            # Don't try an expired session again on every restart
+            Path(STATE_PATH).unlink(missing_ok=True)
+        
         logger.info("Starting login process...")
         
         try:
             # Go to the landing page first
-            await self.page.goto(BASE_URL, wait_until="networkidle")
+            await self.page.goto(BASE_URL, wait_until="domcontentloaded")
             
             # Handle Cloudflare if present
             await CloudflareBypass.handle_cf_challenge(self.page)
+            await self.page.wait_for_selector("a:text('Start now')", state="attached", timeout=10000)
             
             # Click on the link to start booking
             #await MousePatternGenerator.realistic_click(self.page, "a:
             # Click on the link to start booking
-            await MousePatternGenerator.realistic_click(self.page, "a:text('Start now')")
+            landing_url = self.page.url
+            await MousePatternGenerator.realistic_click(self.page, "a:text('Start now')", cdp=self.cdp, viewport=self._viewport)
             
-            # Wait for page load with random delay
-            await self.random_delay(2, 5)
+            # The link normally takes us to the login page on its own
+            try:
+                await self.page.wait_for_url(lambda url: url != landing_url, wait_until="domcontentloaded", timeout=10000)
+            except Exception as e:
+                logger.debug(f"No navigation after 'Start now': {str(e)}")
             
-            # Navigate to the login page
-            await self.page.goto(LOGIN_URL, wait_until="networkidle")
+            # Navigate to the login page only if we didn't land there
+            if urlparse(self.page.url).path != urlparse(LOGIN_URL).path:
+                await self.page.goto(LOGIN_URL, wait_until="domcontentloaded")
             await CloudflareBypass.handle_cf_challenge(self.page)
+            await self.page.wait_for_selector("#driving-licence-number", state="attached", timeout=10000)
             
             # Check for honeypot fields
             await HoneypotDetector.identify_and_avoid_honeypots(self.page)
@@ -818,14 +1184,14 @@ class DrivingTestBooker:
             
             # Submit the form
             await self.random_delay(1, 2)
-            await MousePatternGenerator.realistic_click(self.page, "#booking-login")
+            await MousePatternGenerator.realistic_click(self.page, "#booking-login", cdp=self.cdp, viewport=self._viewport)
             
             # Wait for login result
             try:
-                await self.page.wait_for_selector("#find-test-centres, .error-summary", timeout=10000)
+                await self.wait_dom("#find-test-centres, .error-summary", timeout=10000)
                 
                 # Check if login failed
-                error = await self.page.query_selector(".error-summary")
+                error = await self._cached_qs(".error-summary")
                 if error:
                     error_text = await error.text_content()
                     logger.error(f"Login failed: {error_text}")
@@ -833,6 +1199,12 @@ class DrivingTestBooker:
                 
                 logger.info("Login successful")
                 self.logged_in = True
+                
+                # Save the session so a restart can skip the login form
+                try:
+                    await self.context.storage_state(path=STATE_PATH)
+                except Exception as e:
+                    logger.warning(f"Could not save session state to {STATE_PATH}: {str(e)}")
                 return True
                 
             except Exception as e:
@@ -842,11 +1214,31 @@ class DrivingTestBooker:
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
             # Take screenshot for debugging
-            await self.page.screenshot(path=f"login_error_{int(time.time())}.png")
+            await self._debug_shot("login_error")
+            return False
+    
+    async def _resume_session(self) -> bool:
+        """Check whether the saved session state still lands on an authenticated page"""
+        try:
+            await self.page.goto(BOOKING_URL, wait_until="domcontentloaded")
+            await CloudflareBypass.handle_cf_challenge(self.page)
+            
+            # An expired session is sent back to the login page
+            if urlparse(self.page.url).path == urlparse(LOGIN_URL).path:
+                return False
+            
+            await self.page.wait_for_selector("#find-test-centres", timeout=10000)
+            return True
+            
+        except Exception as e:
+            logger.info(f"Saved session could not be resumed: {str(e)}")
             return False
     
     async def type_like_human(self, selector: str, text: str):
-        """Type text in a human-like manner with variable speed and occasional mistakes"""
+        """
+        Type text in a human-like manner with variable speed and occasional mistakes
+        Only the first few keystrokes are typed, the rest is filled in one go
+        """
         # Wait for the element
         element = await self.page.wait_for_selector(selector)
         if not element:
@@ -857,22 +1249,45 @@ class DrivingTestBooker:
         await element.click(click_count=3)  # Triple click to select all
         await self.page.keyboard.press("Backspace")
         
+        # Keystroke timing matters most at the start of a field
+        head = text[:random.randint(3, 5)]
+        tail = text[len(head):]
+        
+        # Draw every per-keystroke decision up front, as plain Python values
+        # since Playwright can't serialise NumPy scalars
+        n = len(head)
+        mistakes = (_RNG.random(n) < 0.03).tolist()
+        wrong_chars = _RNG.choice(list(self.TYPO_CHARS), size=n).tolist()
+        wrong_delays, delays = _RNG.integers(50, 201, size=(2, n)).tolist()
+        noticed, corrected = _RNG.uniform(0.1, 0.3, size=n).tolist(), _RNG.uniform(0.1, 0.2, size=n).tolist()
+        pauses = (_RNG.random(n) < 0.1).tolist()
+        pause_lengths = _RNG.uniform(0.1, 0.5, size=n).tolist()
+        
         # Type with variable speed
-        for char in text:
+        for i, char in enumerate(head):
             # Randomly make a mistake and correct it (3% chance)
-            if random.random() < 0.03:
-                wrong_char = random.choice("abcdefghijklmnopqrstuvwxyz0123456789")
-                await element.type(wrong_char, delay=random.randint(50, 200))
-                await asyncio.sleep(random.uniform(0.1, 0.3))
+            if mistakes[i]:
+                await element.type(wrong_chars[i], delay=wrong_delays[i])
+                await asyncio.sleep(noticed[i])
                 await self.page.keyboard.press("Backspace")
-                await asyncio.sleep(random.uniform(0.1, 0.2))
+                await asyncio.sleep(corrected[i])
             
             # Type the correct character
-            await element.type(char, delay=random.randint(50, 200))
+            await element.type(char, delay=delays[i])
             
             # Occasionally pause as if thinking
-            if random.random() < 0.1:
-                await asyncio.sleep(random.uniform(0.1, 0.5))
+            if pauses[i]:
+                await asyncio.sleep(pause_lengths[i])
+        
+        # Fill the remainder and fire the events a keystroke would
+        if tail:
+            await element.evaluate("""
+                (el, value) => {
+                    el.value += value;
+                    el.dispatchEvent(new InputEvent('input', { bubbles: true }));
+                    el.dispatchEvent(new Event('change', { bubbles: true }));
+                }
+            """, tail)
         
         return True
     
@@ -887,27 +1302,33 @@ class DrivingTestBooker:
                 logger.error("Failed to navigate to test search - login failed")
                 return False
         
+        tt_sel = f"a:text-matches('{self.config.test_type.value}', 'i')"
+        
         try:
             # Check if we're already on the manage booking page
-            if not await self.page.query_selector("#find-test-centres"):
+            if not await self._cached_qs("#find-test-centres"):
                 # Navigate to the manage booking page
-                await self.page.goto(BOOKING_URL, wait_until="networkidle")
+                await self.page.goto(BOOKING_URL, wait_until="domcontentloaded")
                 await CloudflareBypass.handle_cf_challenge(self.page)
+                await self.page.wait_for_selector(
+                    f"#test-centres-near-you, {tt_sel}",
+                    state="attached",
+                    timeout=10000
+                )
             
-            # Check if we need to select test type
-            test_type_button = await self.page.query_selector(f"a:text-matches('{self.config.test_type.value}', 'i')")
+            # Check if we need to select test type, clicking the handle we found
+            test_type_button = await self.page.query_selector(tt_sel)
             if test_type_button:
-                await MousePatternGenerator.realistic_click(self.page, f"a:text-matches('{self.config.test_type.value}', 'i')")
-                await self.random_delay(1, 3)
+                await MousePatternGenerator.realistic_click(self.page, test_type_button, cdp=self.cdp, viewport=self._viewport)
             
             # Wait for test center search to be available
-            await self.page.wait_for_selector("#test-centres-near-you")
+            await self.wait_for_next("#test-centres-near-you")
             logger.info("Successfully navigated to test search page")
             return True
             
         except Exception as e:
             logger.error(f"Failed to navigate to test search page: {str(e)}")
-            await self.page.screenshot(path=f"navigate_error_{int(time.time())}.png")
+            await self._debug_shot("navigate_error")
             return False
     
     async def search_test_center(self, test_center: TestCenter) -> bool:
@@ -916,7 +1337,7 @@ class DrivingTestBooker:
         
         try:
             # Navigate to test search if needed
-            if not await self.page.query_selector("#test-centres-near-you"):
+            if not await self._cached_qs("#test-centres-near-you"):
                 await self.navigate_to_test_search()
             
             # Wait for search box
@@ -931,37 +1352,74 @@ class DrivingTestBooker:
             await self.type_like_human("#test-centres-near-you", test_center.name)
             await self.random_delay(0.5, 1.5)
             
-            # Submit search
-            await MousePatternGenerator.realistic_click(self.page, "#test-centres-submit")
-            await self.random_delay(1, 3)
+            # Submit search, waiting for the new page so a previous search's
+            # results can't be mistaken for this one's
+            async with self.page.expect_navigation(wait_until="domcontentloaded"):
+                await MousePatternGenerator.realistic_click(self.page, "#test-centres-submit", cdp=self.cdp, viewport=self._viewport)
             
             # Wait for results
-            await self.page.wait_for_selector(".test-centre-results")
+            await self.wait_for_next(".test-centre-results")
             
-            # Check if test center is in results
-            result_links = await self.page.query_selector_all(".test-centre-results a")
-            found = False
-            
-            for link in result_links:
-                text = await link.text_content()
-                if test_center.name.lower() in text.lower():
-                    logger.info(f"Found test center: {test_center.name}")
-                    await MousePatternGenerator.realistic_click(self.page, link)
-                    await self.random_delay(1, 3)
-                    found = True
-                    break
-            
-            if not found:
+            # Check if test center is in results, matching in the page in one round trip
+            idx = await self.page.eval_on_selector_all(".test-centre-results a", _MATCH_LINK_JS, test_center.name)
+            if idx < 0:
                 logger.warning(f"Test center '{test_center.name}' not found in search results")
                 return False
             
+            logger.info(f"Found test center: {test_center.name}")
+            await MousePatternGenerator.realistic_click(self.page, f".test-centre-results a >> nth={idx}", cdp=self.cdp, viewport=self._viewport)
+            await self.wait_for_next(".SlotPicker-days")
             return True
             
         except Exception as e:
             logger.error(f"Error searching for test center: {str(e)}")
-            await self.page.screenshot(path=f"search_error_{int(time.time())}.png")
+            await self._debug_shot("search_error")
             return False
     
+    def _is_wanted_date(self, date_str: str) -> bool:
+        """Check a "YYYY-MM-DD" date against the configured range and preferred days"""
+        try:
+            slot_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            logger.warning(f"Could not parse date: {date_str}")
+            return False
+        
+        # 0 = Monday, 6 = Sunday
+        return self._start_date <= slot_date <= self._end_date and slot_date.weekday() in self.config.preferred_days
+    
+    def _is_wanted_time(self, time_str: str) -> bool:
+        """Check an "HH:MM" time against the preferred time window"""
+        return self._earliest_min <= self._to_minutes(time_str) <= self._latest_min
+    
+    @staticmethod
+    def _day_selector(date_str: str) -> str:
+        """Selector for a day in the slot picker"""
+        return f".SlotPicker-day[data-date='{date_str}']"
+    
+    @staticmethod
+    def _make_slot(test_center: TestCenter, date_str: str, time_str: str, day_sel: str) -> Dict:
+        """Build the slot record used by book_slot, day_sel being the day's _day_selector"""
+        return {
+            "test_center": test_center.name,
+            "date": date_str,
+            "time": time_str,
+            "element_selector": f"{day_sel} + .SlotPicker-day-panel .SlotPicker-time[data-time='{time_str}']"
+        }
+    
+    def _select_slots(self, test_center: TestCenter, day_panels: List[Dict]) -> List[Dict]:
+        """Pick suitable slots, in order, from pre-rendered day panels"""
+        slots = []
+        for day in day_panels:
+            if not day["date"] or not self._is_wanted_date(day["date"]):
+                continue
+            day_sel = self._day_selector(day["date"])
+            for time_str in day["times"]:
+                if time_str and self._is_wanted_time(time_str):
+                    slots.append(self._make_slot(test_center, day["date"], time_str, day_sel))
+                    if self.config.stop_at_first_slot:
+                        return slots
+        return slots
+    
     async def check_available_slots(self, test_center: TestCenter) -> List[Dict]:
         """Check for available slots at a test center"""
         logger.info(f"Checking available slots at {test_center.name}")
@@ -975,67 +1433,57 @@ class DrivingTestBooker:
             # Wait for available dates to load
             await self.page.wait_for_selector(".SlotPicker-days")
             
-            # Extract available dates
-            date_elements = await self.page.query_selector_all(".SlotPicker-days .SlotPicker-day:not(.is-disabled)")
+            # Fast path, read every day's times at once if the panels are pre-rendered
+            day_panels = await self.page.evaluate(_DAY_PANELS_JS)
+            if day_panels is not None:
+                available_slots = self._select_slots(test_center, day_panels)
+                if available_slots:
+                    # Open the earliest day so its times can be clicked when booking
+                    await MousePatternGenerator.realistic_click(self.page, self._day_selector(available_slots[0]["date"]), cdp=self.cdp, viewport=self._viewport)
+                    logger.info(f"Found {len(available_slots)} available slots at {test_center.name}")
+                else:
+                    logger.info(f"No suitable slots found at {test_center.name}")
+                return available_slots
             
-            for date_element in date_elements:
-                date_str = await date_element.get_attribute("data-date")
-                if not date_str:
-                    continue
-                
-                # Parse the date
-                try:
-                    slot_date = datetime.strptime(date_str, "%Y-%m-%d")
-                except ValueError:
-                    logger.warning(f"Could not parse date: {date_str}")
-                    continue
-                
-                # Check if the date is within our desired range
-                if (slot_date < self.config.date_range.start_date or 
-                    slot_date > self.config.date_range.end_date):
+            # Extract available dates in a single round trip
+            dates = await self.page.eval_on_selector_all(
+                ".SlotPicker-days .SlotPicker-day:not(.is-disabled)",
+                "els => els.map(e => e.dataset.date)"
+            )
+            
+            for date_str in dates:
+                if not date_str or not self._is_wanted_date(date_str):
                     continue
                 
-                # Check if it's a preferred day of the week
-                day_of_week = slot_date.weekday()  # 0 = Monday, 6 = Sunday
-                if day_of_week not in self.config.preferred_days:
-                    continue
+                day_sel = self._day_selector(date_str)
+                # Only this day's panel, earlier days' panels stay in the DOM
+                slots_sel = f"{day_sel} + .SlotPicker-day-panel .SlotPicker-timeSlots"
                 
                 # Click on the date to see available times
-                await MousePatternGenerator.realistic_click(self.page, f".SlotPicker-day[data-date='{date_str}']")
-                await self.random_delay(1, 2)
+                await MousePatternGenerator.realistic_click(self.page, day_sel, cdp=self.cdp, viewport=self._viewport)
                 
                 # Wait for time slots to load
                 try:
-                    await self.page.wait_for_selector(".SlotPicker-timeSlots", timeout=5000)
+                    await self.wait_dom(slots_sel)
                 except:
                     logger.warning(f"No time slots available for date {date_str}")
                     continue
                 
-                # Extract available times
-                time_elements = await self.page.query_selector_all(".SlotPicker-timeSlots .SlotPicker-time")
+                # Extract available times in a single round trip
+                times = await self.page.eval_on_selector_all(
+                    f"{slots_sel} .SlotPicker-time",
+                    "els => els.map(e => e.dataset.time)"
+                )
                 
-                for time_element in time_elements:
-                    time_str = await time_element.get_attribute("data-time")
-                    if not time_str:
-                        continue
-                    
-                    # Check if the time is within preferred range
-                    hour, minute = map(int, time_str.split(":"))
-                    earliest_hour, earliest_minute = map(int, self.config.time_preference.earliest.split(":"))
-                    latest_hour, latest_minute = map(int, self.config.time_preference.latest.split(":"))
-                    
-                    time_value = hour * 60 + minute
-                    earliest_value = earliest_hour * 60 + earliest_minute
-                    latest_value = latest_hour * 60 + latest_minute
-                    
-                    if earliest_value <= time_value <= latest_value:
+                for time_str in times:
+                    if time_str and self._is_wanted_time(time_str):
                         # This is a suitable slot
-                        available_slots.append({
-                            "test_center": test_center.name,
-                            "date": date_str,
-                            "time": time_str,
-                            "element_selector": f".SlotPicker-day[data-date='{date_str}'] + .SlotPicker-day-panel .SlotPicker-time[data-time='{time_str}']"
-                        })
+                        available_slots.append(self._make_slot(test_center, date_str, time_str, day_sel))
+                        
+                        if self.config.stop_at_first_slot:
+                            # The picker lists dates and times in order, so this is the earliest
+                            logger.info(f"Found earliest suitable slot at {test_center.name}")
+                            return available_slots
             
             if available_slots:
                 logger.info(f"Found {len(available_slots)} available slots at {test_center.name}")
@@ -1046,7 +1494,7 @@ class DrivingTestBooker:
             
         except Exception as e:
             logger.error(f"Error checking available slots: {str(e)}")
-            await self.page.screenshot(path=f"slots_error_{int(time.time())}.png")
+            await self._debug_shot("slots_error")
             return []
     
     async def book_slot(self, slot: Dict) -> bool:
@@ -1055,31 +1503,35 @@ class DrivingTestBooker:
         
         try:
             # Click on the time slot
-            await MousePatternGenerator.realistic_click(self.page, slot["element_selector"])
-            await self.random_delay(1, 2)
+            await MousePatternGenerator.realistic_click(self.page, slot["element_selector"], cdp=self.cdp, viewport=self._viewport)
+            
+            # Continue is on the page from the start, so wait for the time to be picked instead
+            await self.wait_for_next(f"{slot['element_selector']}:checked, {slot['element_selector']} input:checked", timeout=5000)
             
             # Click continue
-            await MousePatternGenerator.realistic_click(self.page, ".SlotPicker-next")
-            await self.random_delay(2, 4)
+            await MousePatternGenerator.realistic_click(self.page, ".SlotPicker-next", cdp=self.cdp, viewport=self._viewport)
+            await self.wait_for_next("#confirm-changes")
             
             # Confirm booking
-            await MousePatternGenerator.realistic_click(self.page, "#confirm-changes")
+            await MousePatternGenerator.realistic_click(self.page, "#confirm-changes", cdp=self.cdp, viewport=self._viewport)
             
             # Wait for confirmation page
             try:
-                await self.page.wait_for_selector(".confirmation-block", timeout=10000)
+                await self.wait_dom(".confirmation-block", timeout=10000)
                 
                 # Verify the booking was successful
                 confirmation_text = await self.page.text_content(".confirmation-block")
                 if "confirmed" in confirmation_text.lower() or "booked" in confirmation_text.lower():
                     logger.info(f"Successfully booked slot at {slot['test_center']} on {slot['date']} at {slot['time']}")
                     
-                    # Send notifications
-                    await self.notifier.notify_success(
+                    # Send notifications in the background
+                    task = asyncio.create_task(self.notifier.notify_success(
                         test_center=slot['test_center'],
                         test_date=slot['date'],
                         test_time=slot['time']
-                    )
+                    ))
+                    self._bg.add(task)
+                    task.add_done_callback(self._bg.discard)
                     
                     # Take screenshot of confirmation
                     await self.page.screenshot(path=f"booking_confirmation_{int(time.time())}.png")
@@ -1094,10 +1546,10 @@ class DrivingTestBooker:
             
         except Exception as e:
             logger.error(f"Error attempting to book slot: {str(e)}")
-            await self.page.screenshot(path=f"booking_error_{int(time.time())}.png")
+            await self._debug_shot("booking_error")
             return False
     
-    async def run_monitoring_cycle(self):
+    async def run_monitoring_cycle(self) -> CycleResult:
         """Run a full monitoring cycle, checking all test centers"""
         logger.info("Starting monitoring cycle...")
         
@@ -1107,7 +1559,9 @@ class DrivingTestBooker:
                 success = await self.login()
                 if not success:
                     logger.error("Failed to login, will retry in next cycle")
-                    return False
+                    return CycleResult.ERROR
+            
+            slot_seen = False
             
             # Check each test center
             for test_center in self.config.test_centers:
@@ -1118,26 +1572,47 @@ class DrivingTestBooker:
                 available_slots = await self.check_available_slots(test_center)
                 
                 if available_slots:
-                    # Sort slots by date and time
-                    available_slots.sort(key=lambda x: (x['date'], x['time']))
+                    slot_seen = True
                     
-                    # Attempt to book the earliest slot
+                    # Slots come back in date and time order, attempt to book the earliest
                     earliest_slot = available_slots[0]
                     success = await self.book_slot(earliest_slot)
                     
                     if success:
                         logger.info("Booking successful! Monitoring complete.")
-                        return True
+                        return CycleResult.BOOKED
                 
                 # Add some delay between checking different test centers
                 await self.random_delay(3, 8)
             
+            if slot_seen:
+                logger.info("Monitoring cycle complete, slots were found but none could be booked")
+                return CycleResult.SLOT_SEEN
+            
             logger.info("Monitoring cycle complete, no suitable slots found")
-            return False
+            return CycleResult.NO_SLOTS
             
         except Exception as e:
             logger.error(f"Error in monitoring cycle: {str(e)}")
-            return False
+            return CycleResult.ERROR
+    
+    def _next_wait(self, result: CycleResult) -> float:
+        """
+        Seconds to wait before the next cycle. check_interval is the backoff
+        range: the upper bound starts at the minimum right after slots were
+        seen and doubles after each quiet cycle up to the maximum, and the
+        wait is drawn from the upper half of it.
+        """
+        min_wait, max_wait = self.config.check_interval
+        
+        if result is CycleResult.SLOT_SEEN:
+            self._idle_streak = 0
+            return min_wait
+        
+        wait_time = min(max_wait, min_wait * 2 ** self._idle_streak)
+        if wait_time < max_wait:
+            self._idle_streak += 1
+        return random.uniform(max(min_wait, wait_time / 2), wait_time)
     
     async def run(self):
         """Main method to run the monitoring process"""
@@ -1150,22 +1625,20 @@ class DrivingTestBooker:
             while True:
                 try:
                     # Run a monitoring cycle
-                    success = await self.run_monitoring_cycle()
-                    if success:
+                    result = await self.run_monitoring_cycle()
+                    if result is CycleResult.BOOKED:
                         logger.info("Booking successful, stopping automation")
                         break
                     
                 except Exception as e:
                     logger.error(f"Error in monitoring cycle: {str(e)}")
+                    result = CycleResult.ERROR
                     # Restart session on error
                     await self.restart_session()
                 
-                # Wait before next cycle with random delay
-                wait_time = random.randint(
-                    self.config.check_interval[0],
-                    self.config.check_interval[1]
-                )
-                logger.info(f"Waiting {wait_time} seconds before next check...")
+                # Wait before next cycle, backing off while nothing turns up
+                wait_time = self._next_wait(result)
+                logger.info(f"Waiting {wait_time:.0f} seconds before next check...")
                 await asyncio.sleep(wait_time)
             
         except KeyboardInterrupt:
@@ -1179,6 +1652,13 @@ class DrivingTestBooker:
                 await self.context.close()
             if self.browser:
                 await self.browser.close()
+            if self._pw:
+                await self._pw.stop()
+            # Let pending notifications finish before closing their clients
+            if self._bg:
+                await asyncio.gather(*self._bg, return_exceptions=True)
+            await self.notifier.close()
+            await _http_client.aclose()
             
             logger.info("Automation completed")
 